@@ -1,16 +1,62 @@
+import csv
+import hashlib
+import importlib.util
+import json
 import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
-from typing import Optional
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Iterable, Iterator, Optional
 
 import bank_handler
 import numpy as np
 import pandas as pd
 import pdfplumber
 from bank_handler import BankHandler
-from pdfplumber.pdf import PDF
+from pdfplumber.page import Page
+
+# only look for pyarrow here, pandas imports it if the dtype is ever used
+_STRING_DTYPE = (
+    "string[pyarrow]" if importlib.util.find_spec("pyarrow") else None
+)
 
 Table = list[list[Optional[str]]]
 
+_DEFAULT_DATE_FORMAT = "%d/%m/%Y"
+_MONTHS = {
+    month: num
+    for num, month in enumerate(
+        [
+            "JAN",
+            "FEB",
+            "MAR",
+            "APR",
+            "MAY",
+            "JUN",
+            "JUL",
+            "AUG",
+            "SEP",
+            "OCT",
+            "NOV",
+            "DEC",
+        ],
+        start=1,
+    )
+}
+_MONTHS_PADDED = {month: f"{num:02d}" for month, num in _MONTHS.items()}
+_IMPORT_INFO = "[Imported from PDF statement]"
+_IMPORT_SUFFIX = " // " + _IMPORT_INFO
+# any footer match must contain this character
+_FOOTER_PREFIX = "*"
+# footer text, allowing for spaces anywhere in between its characters
+_FOOTER_RE = re.compile(
+    " *".join(map(re.escape, "*Forcreditcardtransactionseffectedincurrencies"))
+)
+
 
 class HsbcHkCreditCardPlugin(BankHandler):
     """
@@ -37,9 +83,27 @@ class HsbcHkCreditCardPlugin(BankHandler):
     STATEMENT_DATE_BOX_RIGHT_MARGIN = 40
     STATEMENT_DATE_BOX_LEFT_MARGIN = 20
 
+    MAX_WORKERS = 8
+    # starting a worker process takes around half a second under spawn, so
+    # a pool only pays for itself on statements with far more pages than usual
+    MIN_PAGES_FOR_PROCESSES = 100
+    CSV_WRITER_MAX_ROWS = 2000
+
+    CACHE_DIR = os.path.join(
+        os.path.expanduser("~"), ".cache", "bank2ynab", "hsbc_hk_cc"
+    )
+    CACHE_VERSION = 1  # bump when the extracted data changes
+    # plugin argument that turns on the cache
+    CACHE_PLUGIN_ARG = "cache"
+
     def __init__(self, config_dict: dict):
         super().__init__(config_dict)
         self.name = "HSBC Hong Kong Credit Card"
+        # the cache holds the statement's transactions, so it is opt-in
+        self.use_cache = self.CACHE_PLUGIN_ARG in (
+            arg.strip().lower()
+            for arg in self.config_dict.get("plugin_args", [])
+        )
 
     def _preprocess_file(self, file_path: str, plugin_args: list) -> str:
         """
@@ -47,7 +111,7 @@ class HsbcHkCreditCardPlugin(BankHandler):
 
         :param file_path: path to PDF file
         :type file_path: str
-        :param plugin_args: plugin arguments (unused in this plugin)
+        :param plugin_args: plugin arguments (read in __init__ instead)
         :type plugin_args: list
         :return: path to CSV file
         :rtype: str
@@ -55,8 +119,8 @@ class HsbcHkCreditCardPlugin(BankHandler):
 
         logging.info("Converting PDF file...")
 
-        # create dataframe from pdf
-        df = self.read_pdf_to_dataframe(
+        # read transactions from pdf
+        table, statement_date = self.read_pdf_to_table(
             pdf_path=file_path, table_cols=self.COLUMNS
         )
         # generate output path
@@ -65,8 +129,19 @@ class HsbcHkCreditCardPlugin(BankHandler):
             prefix=f"converted_pdf_{self.config_dict['bank_name']}_",
             ext=".csv",
         )
-        # write the dataframe to output file
-        df.to_csv(new_path, index=False)
+        # write the transactions to output file
+        output_cols = [*self.COLUMNS, "memo"]
+        if len(table) < self.CSV_WRITER_MAX_ROWS:
+            # small statements are quicker to write without a dataframe
+            with open(new_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator=os.linesep)
+                writer.writerow(output_cols)
+                writer.writerows(self.iter_rows(table, statement_date))
+        else:
+            df = self.convert_to_dataframe(table, self.COLUMNS)
+            self.process_dataframe(df, statement_date).to_csv(
+                new_path, index=False
+            )
         logging.info("\tFinished converting PDF file.")
         return new_path
 
@@ -85,47 +160,51 @@ class HsbcHkCreditCardPlugin(BankHandler):
         :return: processed dataframe of combined tables
         :rtype: pd.DataFrame
         """
-        pdf = pdfplumber.open(pdf_path)
+        table, statement_date = self.read_pdf_to_table(pdf_path, table_cols)
+        df = self.convert_to_dataframe(table, table_cols)
+        processed_df = self.process_dataframe(df, statement_date)
+        return processed_df
 
+    def read_pdf_to_table(
+        self, pdf_path: str, table_cols: list[str]
+    ) -> tuple[Table, date]:
+        """
+        Reads the main table from each page of the statement PDF,
+        combining them into a single table with one row per transaction.
+        The dates and amounts are left as they appear in the statement.
+
+        :param pdf_path: filepath for PDF file
+        :type pdf_path: str
+        :param table_cols: columns of the tables in the PDF
+        :type table_cols: list[str]
+        :return: merged transaction table and the statement date
+        :rtype: tuple[Table, date]
+        """
         logging.info("\tExtracting tables and statement date.")
-        tables, statement_date = self.extract_data(pdf, table_cols)
+        tables, statement_date = self.extract_data(pdf_path, table_cols)
 
         logging.info("\tCleaning and processing table data.")
-        flattened_table = self.preprocess_table(tables)
-        df = self.convert_to_dataframe(flattened_table, table_cols)
-        processed_df = self.process_dataframe(df, statement_date)
-        return processed_df
+        table = self.merge_transactions(self.preprocess_table(tables))
+        if not table:
+            logging.warning("No transactions found in the extracted table.")
+        return table, statement_date
 
     def extract_data(
-        self, pdf: PDF, table_cols: list[str]
+        self, pdf_path: str, table_cols: list[str]
     ) -> tuple[list[Table], date]:
-        statement_date_str = ""
-        tables = []
-        for page_num, page in enumerate(pdf.pages, start=1):
-            if not statement_date_str:
-                statement_date_str = self.extract_statement_date_str(page)
-
-            top = (
-                0
-                if not page.search("Post date")
-                else page.search("Post date")[0]["top"]
-            )
-            bottom = (
-                page.height
-                if not page.search("Minimum payment summary")
-                else page.search("Minimum payment summary")[0]["top"]
-            )
-            bbox = (0, top, page.width, bottom)
-
-            extracted_page = page.crop(bbox).extract_table(
-                self.PDFPLUMBER_TABLE_SETTINGS
+        cached = None
+        if self.use_cache:
+            # re-running on the same statement skips reading the PDF
+            cache_path = self.get_cache_path(pdf_path, table_cols)
+            cached = _read_cache(cache_path)
+        if cached is not None:
+            tables, statement_date_str = cached
+        else:
+            tables, statement_date_str = self._extract_pages(
+                pdf_path, table_cols
             )
-            if extracted_page:
-                if len(extracted_page[0]) != len(table_cols):
-                    raise TableSizeError(
-                        f"Table extracted from page {page_num} has {len(extracted_page[0])} columns, expected {len(table_cols)}."
-                    )
-                tables.append(extracted_page)
+            if self.use_cache:
+                _write_cache(cache_path, tables, statement_date_str)
 
         if not statement_date_str:
             logging.warning(
@@ -133,79 +212,336 @@ class HsbcHkCreditCardPlugin(BankHandler):
             )
             statement_date = date.today()
         else:
-            statement_date = datetime.strptime(
-                statement_date_str, "%d %b %Y"
-            ).date()
+            # the statement date looks like "15 JAN 2024"
+            day, month, year = statement_date_str.split()
+            if month.upper() not in _MONTHS:
+                raise ValueError(
+                    f"Unrecognised statement date: {statement_date_str}"
+                )
+            statement_date = date(int(year), _MONTHS[month.upper()], int(day))
 
         return tables, statement_date
 
-    def preprocess_table(self, table: list[Table]) -> Table:
-        # Flatten table and drop header row from each page
-        return [row for page in table for row in page[1:]]
+    def get_cache_path(self, pdf_path: str, table_cols: list[str]) -> str:
+        """
+        Gets the path of the cached extraction results for a statement,
+        keyed by the contents of the PDF and the table extraction settings.
 
-    def convert_to_dataframe(
-        self, table: Table, table_cols: list[str]
-    ) -> pd.DataFrame:
-        df = (
-            pd.DataFrame(table, columns=table_cols)
-            .replace("", np.nan)
-            .dropna(how="all", ignore_index=True)
-            .fillna("")
+        :param pdf_path: filepath for PDF file
+        :type pdf_path: str
+        :param table_cols: columns of the tables in the PDF
+        :type table_cols: list[str]
+        :return: path to cache file
+        :rtype: str
+        """
+        key = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                key.update(chunk)
+        key.update(
+            json.dumps(
+                {
+                    "version": self.CACHE_VERSION,
+                    "settings": self.PDFPLUMBER_TABLE_SETTINGS,
+                    "cols": table_cols,
+                },
+                sort_keys=True,
+            ).encode()
         )
+        return os.path.join(self.CACHE_DIR, f"{key.hexdigest()}.json")
 
-        if df.empty:
-            logging.warning("No transactions found in the extracted table.")
+    def _extract_pages(
+        self, pdf_path: str, table_cols: list[str]
+    ) -> tuple[list[Table], str]:
+        # look these up once, rather than once per page
+        table_settings = self.PDFPLUMBER_TABLE_SETTINGS
+        num_cols = len(table_cols)
+
+        with pdfplumber.open(pdf_path) as pdf:
+            num_pages = len(pdf.pages)
+            num_workers = min(self.MAX_WORKERS, os.cpu_count() or 1, num_pages)
+            if num_workers < 2 or num_pages < self.MIN_PAGES_FOR_PROCESSES:
+                # starting worker processes costs more than parsing a few
+                # pages, so read them one at a time from this document
+                return self._collect_pages(
+                    self._extract_one_page(
+                        page_num, page, table_settings, num_cols
+                    )
+                    for page_num, page in enumerate(pdf.pages, start=1)
+                )
 
-        return df
+        # pages are independent, and parsing them is CPU bound, so use
+        # processes - each worker opens its own handle to the document
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            try:
+                return self._collect_pages(
+                    executor.map(
+                        self._extract_page_from_file,
+                        repeat(pdf_path),
+                        range(1, num_pages + 1),
+                        repeat(table_settings),
+                        repeat(num_cols),
+                    )
+                )
+            finally:
+                # skip any pages left after the transactions have ended
+                executor.shutdown(wait=False, cancel_futures=True)
 
-    def process_dataframe(
-        self, df: pd.DataFrame, statement_date: date
-    ) -> pd.DataFrame:
-        # Drop previous balance information - begin with first transaction
-        df = drop_until(
-            df, lambda df: (df["post_date"] != "") | (df["trans_date"] != "")
-        )
-        # Drop footer information
-        df = take_until(
-            df,
-            lambda df: df.apply(
-                lambda x: "".join(x).replace(" ", ""), axis=1
-            ).str.contains(r"\*Forcreditcardtransactionseffectedincurrencies"),
+    def _collect_pages(
+        self, page_results: Iterable[tuple[Optional[Table], str, bool]]
+    ) -> tuple[list[Table], str]:
+        """
+        Collects the tables and statement date text from the pages of a
+        statement, in page order, stopping once the transactions have ended.
+
+        :param page_results: results of _extract_one_page for each page
+        :type page_results: Iterable[tuple[Optional[Table], str, bool]]
+        :return: non-empty tables and the statement date text (if any)
+        :rtype: tuple[list[Table], str]
+        """
+        results = []
+        seen_summary = False
+        for result in page_results:
+            # Assumes the transactions end at the first page without a table
+            # after the minimum payment summary - the pages after that only
+            # hold rewards and disclaimers, so they are not read.
+            # Remove this if a statement format breaks that rule.
+            extracted_page, _, has_summary = result
+            if seen_summary and not extracted_page:
+                break
+            results.append(result)
+            seen_summary = seen_summary or has_summary
+
+        tables = [
+            extracted_page
+            for extracted_page, _, _ in results
+            if extracted_page
+        ]
+        statement_date_str = next(
+            (date_str for _, date_str, _ in results if date_str), ""
         )
+        return tables, statement_date_str
 
-        # Merge rows with same transaction
-        df = (
-            df.groupby(
-                ((df["post_date"] != "") | (df["trans_date"] != "")).cumsum()
+    def _extract_page_from_file(
+        self,
+        pdf_path: str,
+        page_num: int,
+        table_settings: dict[str, Any],
+        num_cols: int,
+    ) -> tuple[Optional[Table], str, bool]:
+        # only load the one page this worker needs
+        with pdfplumber.open(pdf_path, pages=[page_num]) as pdf:
+            return self._extract_one_page(
+                page_num, pdf.pages[0], table_settings, num_cols
             )
-            .agg({col: "first" for col in df.columns} | {"payee": list})
-            .reset_index(drop=True)
+
+    def _extract_one_page(
+        self,
+        page_num: int,
+        page: Page,
+        table_settings: dict[str, Any],
+        num_cols: int,
+    ) -> tuple[Optional[Table], str, bool]:
+        """
+        Extracts the transaction table and statement date text from a page.
+
+        :param page_num: page number, used for error messages
+        :type page_num: int
+        :param page: PDF page
+        :type page: Page
+        :param table_settings: pdfplumber table extraction settings
+        :type table_settings: dict[str, Any]
+        :param num_cols: number of columns expected in the table
+        :type num_cols: int
+        :return: extracted table (if any), statement date text (if any),
+        and whether the page has the minimum payment summary
+        :rtype: tuple[Optional[Table], str, bool]
+        """
+        # the statement date is only printed on the first page
+        statement_date_str = (
+            self.extract_statement_date_str(page) if page_num == 1 else ""
         )
 
-        # Populate memo field
-        df["memo"] = df.apply(
-            lambda x: self.create_memo(
-                x["payee"],
-                x["location"],
-                x["country"],
-                x["original_currency"],
-                x["original_amount"],
+        # the page text layout is cached between searches, and only the
+        # top of each match is needed, so skip collecting the matched chars
+        post_date_areas = page.search(
+            "Post date", regex=False, return_chars=False, return_groups=False
+        )
+        summary_areas = page.search(
+            "Minimum payment summary",
+            regex=False,
+            return_chars=False,
+            return_groups=False,
+        )
+        if post_date_areas or summary_areas:
+            # width and height are computed from the bounding box each time
+            x0, page_top, x1, page_bottom = page.bbox
+            top = post_date_areas[0]["top"] if post_date_areas else page_top
+            bottom = summary_areas[0]["top"] if summary_areas else page_bottom
+            bbox = (x0, top, x1, bottom)
+            extracted_page = page.crop(bbox).extract_table(table_settings)
+        else:
+            # cropping to the whole page would only copy its objects
+            extracted_page = page.extract_table(table_settings)
+        if extracted_page and len(extracted_page[0]) != num_cols:
+            raise TableSizeError(
+                f"Table extracted from page {page_num} has {len(extracted_page[0])} columns, expected {num_cols}."
+            )
+        return extracted_page, statement_date_str, bool(summary_areas)
+
+    def preprocess_table(self, table: list[Table]) -> Table:
+        """
+        Flattens the tables from each page into a single table in one pass,
+        keeping only the transaction rows (from the first dated row up to
+        the statement footer). Page headers and empty rows are dropped,
+        and missing cells are replaced with empty strings.
+
+        :param table: tables extracted from each page
+        :type table: list[Table]
+        :return: cleaned table of transaction rows
+        :rtype: Table
+        """
+        if not table:
+            return []
+        # copy each page's rows straight into one preallocated array
+        num_rows = sum(len(page) - 1 for page in table)
+        num_cols = len(table[0][0])
+        cells = np.empty((num_rows, num_cols), dtype=object)
+        row_num = 0
+        for page in table:
+            page_rows = page[1:]
+            if page_rows:
+                cells[row_num : row_num + len(page_rows)] = np.asarray(
+                    page_rows, dtype=object
+                )
+                row_num += len(page_rows)
+        cells[cells == None] = ""  # noqa: E711
+        # drop empty rows
+        cells = cells[(cells != "").any(axis=1)]
+        # skip previous balance information before the first dated row,
+        # argmax alone would give 0 when there are no dated rows
+        dated = (cells[:, 0] != "") | (cells[:, 1] != "")
+        cells = cells[int(dated.argmax()) if dated.any() else len(cells) :]
+        # the footer can only start in a row with a cell containing its
+        # first character, which is cheap to search for in all cells at once
+        maybe_footer = (
+            np.char.find(cells.astype(str), _FOOTER_PREFIX) >= 0
+        ).any(axis=1)
+        end = next(
+            (
+                i
+                for i in np.flatnonzero(maybe_footer)
+                if _is_footer_row(cells[i])
             ),
-            axis=1,
+            len(cells),
         )
-        df["payee"] = df["payee"].apply(lambda x: x[0])
+        return cells[:end].tolist()
+
+    def merge_transactions(self, table: Table) -> Table:
+        """
+        Merges the rows of each transaction into a single row.
+        The payee cell of each merged row holds the list of all of the
+        transaction's payee lines, the rest are taken from its first row.
+
+        :param table: cleaned table of transaction rows, in COLUMNS order
+        :type table: Table
+        :return: table with one row per transaction
+        :rtype: Table
+        """
+        if not table:
+            return []
+        cells = np.asarray(table, dtype=object)
+
+        # a dated row begins a new transaction, the rest continue it
+        starts = np.flatnonzero((cells[:, 0] != "") | (cells[:, 1] != ""))
+        if not len(starts) or starts[0] != 0:
+            starts = np.r_[0, starts]
+        ends = np.r_[starts[1:], len(cells)]
+
+        payees = cells[:, 2]
+        merged_table = cells[starts].tolist()
+        for row, start, end in zip(merged_table, starts, ends):
+            row[2] = payees[start:end].tolist()
+        return merged_table
+
+    def convert_to_dataframe(
+        self, table: Table, table_cols: list[str]
+    ) -> pd.DataFrame:
+        # filling a fixed shape array keeps the payee lists as single cells,
+        # and the dataframe can then use the array without copying it
+        cells = np.empty((len(table), len(table_cols)), dtype=object)
+        if table:
+            cells[:] = table
+        return pd.DataFrame(cells, columns=table_cols, copy=False)
+
+    def iter_rows(
+        self, table: Table, statement_date: date
+    ) -> Iterator[list[str]]:
+        """
+        Row by row version of process_dataframe, for small tables.
+        Rows are yielded one at a time so they can be streamed to a file.
+
+        :param table: merged transaction table
+        :type table: Table
+        :param statement_date: statement date, used to add years to dates
+        :type statement_date: date
+        :return: rows with formatted dates, signed amounts and memos
+        :rtype: Iterator[list[str]]
+        """
+        date_format = self.config_dict["date_format"]
+        # info is location, country, original currency and original amount
+        for post_date, trans_date, payee_lines, *info, hkd_amount in table:
+            yield [
+                self.parse_and_add_year_to_date(
+                    post_date,
+                    statement_date,
+                    output_date_format=date_format,
+                ),
+                self.parse_and_add_year_to_date(
+                    trans_date,
+                    statement_date,
+                    output_date_format=date_format,
+                ),
+                payee_lines[0],
+                *info,
+                self.add_sign_to_transaction(hkd_amount),
+                self.create_memo(payee_lines, *info),
+            ]
+
+    def process_dataframe(
+        self, df: pd.DataFrame, statement_date: date
+    ) -> pd.DataFrame:
+        # Keep first payee line as the payee, and the rest as memo details,
+        # going through the payee lines once
+        payees = []
+        details = []
+        for lines in df["payee"].tolist():
+            payees.append(lines[0])
+            details.append(
+                ", ".join([x.strip() for x in lines[1:]])
+                if len(lines) > 1
+                else None
+            )
+        df["payee"] = payees
+        if _STRING_DTYPE is not None:
+            # arrow backed strings keep the string operations below in C
+            df = df.astype(_STRING_DTYPE)
+        # Populate memo field
+        df["memo"] = _vec_create_memo(df, np.array(details, dtype=object))
 
         # Add year to transaction dates, based on statement date
-        df[["post_date", "trans_date"]] = df[
-            ["post_date", "trans_date"]
-        ].applymap(
-            self.parse_and_add_year_to_date,
-            output_date_format=self.config_dict["date_format"],
-            statement_date=statement_date,
-        )
+        for col in ("post_date", "trans_date"):
+            df[col] = _vec_parse_dates(
+                df[col],
+                statement_date=statement_date,
+                output_date_format=self.config_dict["date_format"],
+            )
 
         # Convert hkd_amount column to expected inflow format
-        df["hkd_amount"] = df["hkd_amount"].apply(self.add_sign_to_transaction)
+        amounts = df["hkd_amount"]
+        df["hkd_amount"] = np.where(
+            amounts.str.endswith("CR"), amounts.str[:-2], "-" + amounts
+        )
 
         return df
 
@@ -235,50 +571,62 @@ class HsbcHkCreditCardPlugin(BankHandler):
         original_currency: str,
         original_amount: str,
     ) -> str:
-        memo = []
+        assert (
+            original_amount or not original_currency
+        ), "A foreign currency symbol exists, but no corresponding amount"
 
         if location:
-            memo.append(
-                f"Location: {location}" + (f", {country}" if country else "")
-            )
-        elif country:
-            memo.append(f"Country: {country}")
-
-        if original_currency:
-            assert (
-                original_amount
-            ), "A foreign currency symbol exists, but no corresponding amount"
-            memo.append(
-                f"Original amount: {original_amount} {original_currency}"
+            location_info = f"Location: {location}" + (
+                f", {country}" if country else ""
             )
+        else:
+            location_info = f"Country: {country}" if country else ""
+        currency_info = (
+            f"Original amount: {original_amount} {original_currency}"
+            if original_currency
+            else ""
+        )
+        details_info = (
+            "Details: " + ", ".join([x.strip() for x in payee_info[1:]])
+            if len(payee_info) > 1
+            else ""
+        )
 
-        if len(payee_info) > 1:
-            info = ", ".join(x.strip() for x in payee_info[1:])
-            memo.append(f"Details: {info}")
-
-        memo_str = "; ".join(memo)
-        import_info_text = "[Imported from PDF statement]"
-        return (
-            memo_str + " // " + import_info_text
-            if memo_str
-            else import_info_text
+        # empty parts are left out of the memo
+        memo_str = "; ".join(
+            filter(None, (location_info, currency_info, details_info))
         )
+        return memo_str + _IMPORT_SUFFIX if memo_str else _IMPORT_INFO
 
     def parse_and_add_year_to_date(
         self,
         date_string: str,
         statement_date: date,
         input_date_format: str = "%d%b",
-        output_date_format: str = "%d/%m/%Y",
+        output_date_format: str = _DEFAULT_DATE_FORMAT,
     ) -> str:
-        parsed_date = datetime.strptime(date_string, input_date_format).date()
-        if parsed_date.month == 12 and statement_date.month == 1:
-            return parsed_date.replace(year=statement_date.year - 1).strftime(
-                output_date_format
-            )
-        return parsed_date.replace(year=statement_date.year).strftime(
-            output_date_format
+        if input_date_format == "%d%b":
+            # statement dates always look like "28DEC", so skip strptime
+            day = int(date_string[:-3])
+            month = _MONTHS.get(date_string[-3:].upper(), 0)
+            if not month:
+                raise ValueError(
+                    f"Unrecognised transaction date: {date_string}"
+                )
+        else:
+            parsed_date = datetime.strptime(
+                date_string, input_date_format
+            ).date()
+            day, month = parsed_date.day, parsed_date.month
+
+        year = (
+            statement_date.year - 1
+            if month == 12 and statement_date.month == 1
+            else statement_date.year
         )
+        if output_date_format == _DEFAULT_DATE_FORMAT:
+            return f"{day:02d}/{month:02d}/{year}"
+        return _format_date(year, month, day, output_date_format)
 
     def add_sign_to_transaction(self, amount: str) -> str:
         if amount[-2:] == "CR":
@@ -294,9 +642,131 @@ def build_bank(config):
     return HsbcHkCreditCardPlugin(config)
 
 
-def drop_until(df: pd.DataFrame, predicate, *args, **kwargs) -> pd.DataFrame:
-    return df[predicate(df, *args, **kwargs).idxmax() :].reset_index(drop=True)
+@lru_cache(maxsize=1024)
+def _format_date(year: int, month: int, day: int, date_format: str) -> str:
+    # statements only span a few dozen distinct dates, so each date object
+    # only needs to be created and formatted once
+    return date(year, month, day).strftime(date_format)
 
 
-def take_until(df: pd.DataFrame, predicate, *args, **kwargs) -> pd.DataFrame:
-    return df[: predicate(df, *args, **kwargs).idxmax()].reset_index(drop=True)
+def _read_cache(cache_path: str) -> Optional[tuple[list[Table], str]]:
+    """
+    Reads cached extraction results, if there are any usable ones.
+    """
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached["tables"], cached["statement_date"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError):
+        logging.warning(f"Ignoring unreadable cache file: {cache_path}")
+        return None
+
+
+def _write_cache(
+    cache_path: str, tables: list[Table], statement_date_str: str
+) -> None:
+    """
+    Writes extraction results to the cache. Failing to do so is not an error.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        # the cache holds transaction details, so keep it private to the user
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        os.chmod(cache_dir, 0o700)  # in case it already existed
+        # mkstemp creates the file with mode 0o600
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"tables": tables, "statement_date": statement_date_str},
+                    f,
+                )
+            # replace the cache file in one step, so it is never half written
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except OSError:
+        logging.warning(f"Could not write cache file: {cache_path}")
+
+
+def _is_footer_row(row: list[str]) -> bool:
+    """
+    Checks whether a row is the start of the statement footer, which may be
+    split across several of its cells.
+    """
+    return _FOOTER_RE.search("".join(row)) is not None
+
+
+def _vec_create_memo(df: pd.DataFrame, details: np.ndarray) -> np.ndarray:
+    """
+    Vectorised version of create_memo for a whole dataframe, where details
+    holds the joined extra payee lines of each transaction (or None).
+    """
+    location = df["location"].to_numpy()
+    country = df["country"].to_numpy()
+    original_currency = df["original_currency"].to_numpy()
+    original_amount = df["original_amount"].to_numpy()
+    has_country = country != ""
+    has_currency = original_currency != ""
+    assert not (
+        has_currency & (original_amount == "")
+    ).any(), "A foreign currency symbol exists, but no corresponding amount"
+
+    location_info = np.where(
+        location != "",
+        "Location: " + location + np.where(has_country, ", " + country, ""),
+        np.where(has_country, "Country: " + country, ""),
+    )
+    currency_info = np.where(
+        has_currency,
+        "Original amount: " + original_amount + " " + original_currency,
+        "",
+    )
+    has_details = details != None  # noqa: E711
+    details_info = np.full(len(df), "", dtype=object)
+    details_info[has_details] = "Details: " + details[has_details]
+
+    memo = np.full(len(df), "", dtype=object)
+    for info in (location_info, currency_info, details_info):
+        memo = np.where(
+            info == "", memo, np.where(memo == "", info, memo + "; " + info)
+        )
+    return np.where(memo == "", _IMPORT_INFO, memo + _IMPORT_SUFFIX)
+
+
+def _vec_parse_dates(
+    series: pd.Series,
+    statement_date: date,
+    output_date_format: str = _DEFAULT_DATE_FORMAT,
+) -> pd.Series:
+    """
+    Vectorised version of parse_and_add_year_to_date for a whole column
+    of "%d%b" dates.
+    """
+    day = series.str[:-3].str.zfill(2)
+    month_str = series.str[-3:].str.upper()
+    month = month_str.map(_MONTHS)
+    if month.isna().any():
+        raise ValueError(
+            f"Unrecognised transaction date in {series.name} column."
+        )
+
+    year = pd.Series(
+        np.where(
+            (month == 12) & (statement_date.month == 1),
+            statement_date.year - 1,
+            statement_date.year,
+        ),
+        index=series.index,
+    )
+    if output_date_format == _DEFAULT_DATE_FORMAT:
+        return (
+            day + "/" + month_str.map(_MONTHS_PADDED) + "/" + year.astype(str)
+        )
+    # assemble the dates from their parts rather than parsing strings again
+    return pd.to_datetime(
+        {"year": year, "month": month, "day": day.astype(int)}
+    ).dt.strftime(output_date_format)
@@ -0,0 +1,182 @@
+import importlib.util
+import os
+import stat
+import tempfile
+import unittest
+from datetime import date
+from unittest import TestCase, mock
+
+from bank2ynab.plugins import hsbc_hk_cc_plugin
+from bank2ynab.plugins.hsbc_hk_cc_plugin import HsbcHkCreditCardPlugin
+
+HEADER = [
+    "Post date",
+    "Trans date",
+    "Description",
+    None,
+    None,
+    None,
+    None,
+    "Amount (HKD)",
+]
+# tables as extracted from each page of a statement
+PAGES = [
+    [
+        HEADER,
+        ["", "", "PREVIOUS BALANCE", None, None, None, None, "1,000.00"],
+        ["28DEC", "27DEC", "SHOP A", "HONG KONG", "HK", "", "", "100.00"],
+        [None, None, "  extra line 1 ", None, None, None, None, None],
+        [None, None, None, None, None, None, None, None],
+        ["02JAN", "31DEC", "PAYMENT - THANK YOU", "", "", "", "", "500.00CR"],
+    ],
+    [HEADER],
+    [
+        HEADER,
+        ["05Jan", "3JAN", "AMAZON", "", "US", "USD", "12.34", "96.50"],
+        ["07JAN", "06JAN", "CAFE", "TOKYO", "", "JPY", "1000", "50.00"],
+        ["", "", "ref 123", "", "", "", "", ""],
+        # the footer can be split across cells
+        [
+            "",
+            "",
+            "*For credit card transactions",
+            "effected in currencies",
+            "other than HKD",
+            "",
+            "",
+            "",
+        ],
+        ["08JAN", "08JAN", "AFTER FOOTER", "", "", "", "", "1.00"],
+    ],
+]
+DATE_FORMATS = ["%d/%m/%Y", "%m/%d/%y", "%Y-%m-%d"]
+
+
+class TestHsbcHkCreditCardPlugin(TestCase):
+    def setUp(self) -> None:
+        self.statement_date = date(2024, 1, 15)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        return super().tearDown()
+
+    def get_table(self, plugin: HsbcHkCreditCardPlugin) -> list:
+        return plugin.merge_transactions(plugin.preprocess_table(PAGES))
+
+    def test_merge_transactions(self):
+        """Check that only the transaction rows are kept and merged."""
+        plugin = HsbcHkCreditCardPlugin({"date_format": DATE_FORMATS[0]})
+        table = self.get_table(plugin)
+        # previous balance, empty rows and the footer onwards are dropped
+        self.assertEqual(
+            [row[2] for row in table],
+            [
+                ["SHOP A", "  extra line 1 "],
+                ["PAYMENT - THANK YOU"],
+                ["AMAZON"],
+                ["CAFE", "ref 123"],
+            ],
+        )
+        # missing cells are filled in from None
+        self.assertEqual(
+            table[0][:2] + table[0][3:],
+            ["28DEC", "27DEC", "HONG KONG", "HK", "", "", "100.00"],
+        )
+
+    def assert_paths_match(self, string_dtype) -> None:
+        """
+        Check that statements give the same rows whether they are written
+        row by row or through a dataframe with the given string dtype.
+        """
+        for date_format in DATE_FORMATS:
+            with self.subTest(date_format=date_format), mock.patch.object(
+                hsbc_hk_cc_plugin, "_STRING_DTYPE", string_dtype
+            ):
+                plugin = HsbcHkCreditCardPlugin({"date_format": date_format})
+                table = self.get_table(plugin)
+                rows = list(plugin.iter_rows(table, self.statement_date))
+                df = plugin.process_dataframe(
+                    plugin.convert_to_dataframe(table, plugin.COLUMNS),
+                    self.statement_date,
+                )
+                self.assertEqual(list(df.columns), [*plugin.COLUMNS, "memo"])
+                self.assertEqual(df.to_numpy().tolist(), rows)
+
+    def test_row_and_dataframe_paths_match(self):
+        """Check both output paths with plain object strings."""
+        self.assert_paths_match(None)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("pyarrow"), "pyarrow is not installed"
+    )
+    def test_row_and_arrow_dataframe_paths_match(self):
+        """Check both output paths with arrow backed strings."""
+        self.assert_paths_match("string[pyarrow]")
+
+    def test_iter_rows(self):
+        """Check the formatting of dates, amounts and memos."""
+        plugin = HsbcHkCreditCardPlugin({"date_format": DATE_FORMATS[0]})
+        rows = list(
+            plugin.iter_rows(self.get_table(plugin), self.statement_date)
+        )
+        self.assertEqual(
+            rows[0],
+            [
+                "28/12/2023",
+                "27/12/2023",
+                "SHOP A",
+                "HONG KONG",
+                "HK",
+                "",
+                "",
+                "-100.00",
+                "Location: HONG KONG, HK; Details: extra line 1"
+                " // [Imported from PDF statement]",
+            ],
+        )
+        self.assertEqual(rows[1][:2], ["02/01/2024", "31/12/2023"])
+        self.assertEqual(
+            rows[1][7:], ["500.00", "[Imported from PDF statement]"]
+        )
+        self.assertEqual(rows[2][:2], ["05/01/2024", "03/01/2024"])
+        self.assertEqual(
+            rows[2][8],
+            "Country: US; Original amount: 12.34 USD"
+            " // [Imported from PDF statement]",
+        )
+
+    def test_extract_data_cache(self):
+        """Check that the cache is opt-in, private and reused."""
+        extracted = (PAGES, "15 JAN 2024")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "2024-01-15_Statement.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF")
+            cache_dir = os.path.join(tmp_dir, "cache")
+
+            for plugin_args, num_reads in [([""], 2), (["cache"], 1)]:
+                with self.subTest(plugin_args=plugin_args):
+                    plugin = HsbcHkCreditCardPlugin(
+                        {"date_format": "%d/%m/%Y", "plugin_args": plugin_args}
+                    )
+                    plugin.CACHE_DIR = cache_dir
+                    with mock.patch.object(
+                        plugin, "_extract_pages", return_value=extracted
+                    ) as extract_pages:
+                        for _ in range(2):
+                            self.assertEqual(
+                                plugin.extract_data(pdf_path, plugin.COLUMNS),
+                                (PAGES, date(2024, 1, 15)),
+                            )
+                    self.assertEqual(extract_pages.call_count, num_reads)
+
+            cache_files = os.listdir(cache_dir)
+            self.assertEqual(len(cache_files), 1)
+            if os.name == "posix":
+                cache_file = os.path.join(cache_dir, cache_files[0])
+                self.assertEqual(
+                    stat.S_IMODE(os.stat(cache_dir).st_mode), 0o700
+                )
+                self.assertEqual(
+                    stat.S_IMODE(os.stat(cache_file).st_mode), 0o600
+                )